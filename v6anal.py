@@ -5,14 +5,84 @@ Use this to analyze and visualize the collected data
 """
 
 import json
-import glob
+import functools
+import importlib.util
 import argparse
 import datetime
+import textwrap
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; pandas' own JSON reader is used without it
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.json as pa_json
+except ImportError:
+    # pyarrow is optional; without it the NDJSON files are parsed in Python
+    pa = None
+
+# Number of checks averaged in the rolling plots
+ROLLING_WINDOW = 10
+
+# Beyond this many points per window the numba rolling engine beats pandas' Cython kernels
+NUMBA_MIN_WINDOW = 128
+HAVE_NUMBA = importlib.util.find_spec('numba') is not None
+
+# Plot width in pixels (12in at matplotlib's default 100 dpi); series are decimated to it
+PLOT_WIDTH_PX = 1200
+
+# Fields Arrow's JSON reader extracts from each check; everything else is skipped unparsed
+CHECK_JSON_SCHEMA = pa.schema([
+    ('timestamp', pa.float64()),
+    ('datetime', pa.string()),
+    ('tcp_connection', pa.struct([
+        ('success', pa.bool_()),
+        ('latency', pa.float32()),
+        ('error', pa.string())
+    ])),
+    ('ping_results', pa.struct([
+        ('success', pa.bool_()),
+        ('ping', pa.struct([
+            ('min', pa.float32()),
+            ('avg', pa.float32()),
+            ('max', pa.float32()),
+            ('loss_percent', pa.float32())
+        ]))
+    ]))
+]) if pa is not None else None
+
+# Column names load_data exposes, keyed by the Arrow reader's flattened paths
+# (CHECK_JSON_COLUMNS) and by the pandas json_normalize names (CHECK_COLUMNS)
+CHECK_JSON_COLUMNS = {
+    'timestamp': 'timestamp',
+    'datetime': 'datetime',
+    'tcp_connection.success': 'tcp_success',
+    'tcp_connection.latency': 'tcp_latency',
+    'tcp_connection.error': 'tcp_error',
+    'ping_results.success': 'ping_success',
+    'ping_results.ping.min': 'ping_min',
+    'ping_results.ping.avg': 'ping_avg',
+    'ping_results.ping.max': 'ping_max',
+    'ping_results.ping.loss_percent': 'ping_loss'
+}
+CHECK_COLUMNS = {
+    'tcp_success': 'tcp_success',
+    'tcp_latency': 'tcp_latency',
+    'tcp_error': 'tcp_error',
+    'ping_success': 'ping_success',
+    'ping_ping_min': 'ping_min',
+    'ping_ping_avg': 'ping_avg',
+    'ping_ping_max': 'ping_max',
+    'ping_ping_loss_percent': 'ping_loss'
+}
+
 def load_data(data_dir, days=7):
     """Load data from the specified directory for the last N days"""
     data_dir = Path(data_dir)
@@ -22,186 +92,331 @@ def load_data(data_dir, days=7):
     start_date = end_date - datetime.timedelta(days=days)
     
     # Find all check files in the date range
-    all_files = []
-    current_date = start_date
-    while current_date <= end_date:
-        date_str = current_date.strftime("%Y%m%d")
-        file_pattern = str(data_dir / f"checks_{date_str}.json")
-        all_files.extend(glob.glob(file_pattern))
-        current_date += datetime.timedelta(days=1)
-    
-    # Load data from files
+    all_files = _check_files(str(data_dir), start_date.strftime("%Y%m%d"), end_date.strftime("%Y%m%d"))
+    
+    # Load data from files, one vectorized read per daily file
+    frames = []
+    for file_path in all_files:
+        # The client also writes checks as a typed Arrow stream when pyarrow is available.
+        # It can lag the JSON file (buffered rows, killed runs), so only use it when complete.
+        arrow_path = file_path.with_suffix('.arrow')
+        if pa is not None and arrow_path.exists():
+            frame = _read_arrow_file(arrow_path)
+            if frame is not None and len(frame) == _count_records(file_path):
+                frames.append(frame)
+                continue
+        
+        try:
+            if pa is not None:
+                # Arrow's NDJSON reader parses straight into typed columns in one pass
+                frames.append(_read_json_columnar(file_path))
+                continue
+            frame = _read_check_file(file_path)
+        except ValueError:
+            # A truncated or corrupt line fails the whole file, so retry line by line
+            frame = pd.DataFrame(_load_lines(file_path))
+        frames.append(_flatten_checks(frame))
+    
+    if not frames:
+        return pd.DataFrame()
+    
+    return pd.concat(frames, ignore_index=True)
+
+@functools.lru_cache(maxsize=32)
+def _check_files(data_dir, start, end):
+    """List check files whose YYYYMMDD date falls within [start, end], cached per process"""
+    # File names are checks_YYYYMMDD.json, so the date slice compares lexicographically
+    return tuple(p for p in sorted(Path(data_dir).glob('checks_*.json')) if start <= p.name[7:15] <= end)
+
+def _read_check_file(file_path):
+    """Parse one NDJSON check file into a DataFrame"""
+    if orjson is None:
+        return pd.read_json(file_path, lines=True, convert_dates=False)
+    
+    # Join the lines into a single JSON array so orjson parses the whole file in one call
+    with open(file_path, 'rb') as f:
+        lines = f.read().splitlines()
+    return pd.DataFrame(orjson.loads(b'[' + b','.join(filter(None, lines)) + b']'))
+
+def _read_json_columnar(file_path):
+    """Parse one NDJSON check file into flat typed columns with Arrow's JSON reader"""
+    options = pa_json.ParseOptions(explicit_schema=CHECK_JSON_SCHEMA, unexpected_field_behavior='ignore')
+    table = pa_json.read_json(file_path, parse_options=options)
+    
+    # Two levels of nesting (ping_results.ping.min), so flatten twice
+    table = table.flatten().flatten().select(list(CHECK_JSON_COLUMNS))
+    return table.rename_columns(list(CHECK_JSON_COLUMNS.values())).to_pandas()
+
+def _read_arrow_file(file_path):
+    """Read every Arrow IPC stream appended to a check file into a DataFrame, None if unreadable"""
+    batches = []
+    size = file_path.stat().st_size
+    with open(file_path, 'rb') as f:
+        # Each client run appends a new stream, so keep opening streams until the end
+        while f.tell() < size:
+            try:
+                batches.extend(pa.ipc.open_stream(f))
+            except (pa.ArrowException, OSError):
+                # A killed run leaves an unterminated or torn stream; the JSON file is used instead
+                print(f"Error reading stream in {file_path}, using the JSON file")
+                return None
+    
+    return pa.Table.from_batches(batches).to_pandas() if batches else pd.DataFrame()
+
+def _count_records(file_path):
+    """Count the records in a check file; the client ends every record with a newline"""
+    with open(file_path, 'rb') as f:
+        return f.read().count(b'\n')
+
+def _load_lines(file_path):
+    """Parse a check file line by line, skipping lines that are not valid JSON"""
+    loads = orjson.loads if orjson is not None else json.loads
     data = []
-    for file_path in sorted(all_files):
-        with open(file_path, 'r') as f:
-            for line in f:
-                try:
-                    entry = json.loads(line.strip())
-                    data.append(entry)
-                except json.JSONDecodeError:
-                    print(f"Error parsing line in {file_path}")
+    with open(file_path, 'rb') as f:
+        for line in f:
+            try:
+                entry = loads(line)
+                data.append(entry)
+            except json.JSONDecodeError:
+                print(f"Error parsing line in {file_path}")
     
     return data
 
+def _flatten_checks(data):
+    """Flatten raw nested check records into one column per field"""
+    if data.empty:
+        return data
+    
+    # Flatten the nested tcp/ping records into columns in one pass each
+    tcp = pd.json_normalize(data['tcp_connection'].tolist(), sep='_').add_prefix('tcp_')
+    ping = pd.json_normalize(data['ping_results'].tolist(), sep='_').add_prefix('ping_')
+    
+    # Columns can be absent entirely, e.g. when no ping succeeded in the window
+    df = pd.concat([tcp, ping], axis=1).reindex(columns=list(CHECK_COLUMNS))
+    df = df.rename(columns=CHECK_COLUMNS)
+    df.insert(0, 'timestamp', data['timestamp'].to_numpy())
+    df.insert(1, 'datetime', data['datetime'].to_numpy())
+    
+    return df
+
 def analyze_data(data):
     """Analyze the loaded data and create a DataFrame"""
-    if not data:
+    if data is None or data.empty:
         print("No data found for the specified period.")
         return None
     
-    # Extract relevant fields
-    results = []
-    for entry in data:
-        # Basic information
-        timestamp = entry.get('timestamp')
-        datetime_str = entry.get('datetime')
-        
-        # TCP connection info
-        tcp_success = entry.get('tcp_connection', {}).get('success', False)
-        tcp_latency = entry.get('tcp_connection', {}).get('latency')
-        tcp_error = entry.get('tcp_connection', {}).get('error')
-        
-        # Ping info
-        ping_success = entry.get('ping_results', {}).get('success', False)
-        
-        ping_min = None
-        ping_avg = None
-        ping_max = None
-        ping_loss = None
-        
-        if ping_success and 'ping' in entry.get('ping_results', {}):
-            ping_data = entry['ping_results']['ping']
-            ping_min = ping_data.get('min')
-            ping_avg = ping_data.get('avg')
-            ping_max = ping_data.get('max')
-            ping_loss = ping_data.get('loss_percent')
-        
-        results.append({
-            'timestamp': timestamp,
-            'datetime': datetime_str,
-            'tcp_success': tcp_success,
-            'tcp_latency': tcp_latency,
-            'tcp_error': tcp_error,
-            'ping_success': ping_success,
-            'ping_min': ping_min,
-            'ping_avg': ping_avg,
-            'ping_max': ping_max,
-            'ping_loss': ping_loss
-        })
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(results)
+    df = data.assign(
+        tcp_success=data['tcp_success'].fillna(False),
+        ping_success=data['ping_success'].fillna(False)
+    )
+    
+    # Narrow dtypes to cut memory and speed up rolling/groupby over every row
+    df = df.astype({
+        'tcp_success': 'bool',
+        'ping_success': 'bool',
+        'tcp_latency': 'float32',
+        'ping_min': 'float32',
+        'ping_avg': 'float32',
+        'ping_max': 'float32',
+        'ping_loss': 'float32',
+        'tcp_error': 'category'
+    })
     
     # Convert timestamp to datetime for easier analysis
-    df['datetime'] = pd.to_datetime(df['datetime'])
+    df['datetime'] = pd.to_datetime(df['datetime'], format='ISO8601', cache=True)
     
     # Sort by datetime
     df = df.sort_values('datetime')
     
     return df
 
+def _pixel_bin(index, width=PLOT_WIDTH_PX):
+    """Resample rule giving one bin per pixel column, or None when the series already fits"""
+    span = index.max() - index.min()
+    if len(index) <= width or span <= pd.Timedelta(0):
+        return None
+    
+    # At least a second wide
+    return (span / width).ceil('s')
+
+def _envelope(times, values, width=PLOT_WIDTH_PX):
+    """Reduce a time series to per-pixel-column min/mean/max so plot cost follows canvas width"""
+    series = pd.Series(np.asarray(values), index=pd.DatetimeIndex(times))
+    rule = _pixel_bin(series.index, width)
+    if rule is None:
+        v = series.to_numpy()
+        return pd.DataFrame({'min': v, 'mean': v, 'max': v}, index=series.index)
+    
+    return series.resample(rule).agg(['min', 'mean', 'max']).dropna()
+
+def _envelope_columns(times, frame, how, width=PLOT_WIDTH_PX):
+    """Reduce several columns per pixel column in one resample, each with its own aggregate"""
+    frame = frame.set_axis(pd.DatetimeIndex(times))
+    rule = _pixel_bin(frame.index, width)
+    if rule is None:
+        return frame
+    
+    # One shared index, so the columns stay aligned bin for bin
+    return frame.resample(rule).agg(how).dropna(how='all')
+
+def _rolling_mean(series, window=ROLLING_WINDOW):
+    """Rolling mean, switching to the numba engine for long windows when numba is installed"""
+    rolling = series.rolling(window=window)
+    if HAVE_NUMBA and window > NUMBA_MIN_WINDOW:
+        return rolling.mean(engine='numba', engine_kwargs={'parallel': True})
+    return rolling.mean()
+
 def generate_plots(df, output_dir='.'):
     """Generate visualization plots"""
     output_dir = Path(output_dir)
     output_dir.mkdir(exist_ok=True)
     
-    # Set default figure size
-    plt.figure(figsize=(12, 7))
+    # Success masks shared by the filtered plots below
+    tcp_mask = df['tcp_success'].to_numpy()
+    ping_mask = df['ping_success'].to_numpy()
+    
+    # One figure is reused for every plot and cleared between them
+    fig, ax = plt.subplots(figsize=(12, 7))
     
     # Plot 1: TCP Connection Success Rate over time
-    plt.figure(figsize=(12, 7))
-    df['success_rolling'] = df['tcp_success'].rolling(window=10).mean()
-    plt.plot(df['datetime'], df['success_rolling'], label='Connection Success Rate (10-point rolling avg)')
-    plt.scatter(df['datetime'], df['tcp_success'], alpha=0.3, label='Individual Checks')
-    plt.xlabel('Date/Time')
-    plt.ylabel('Success Rate')
-    plt.title('IPv6 Connection Success Rate Over Time')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(output_dir / 'connection_success_rate.png')
-    plt.close()
+    # int8 keeps the 0/1 series compact for both the rolling mean and the scatter
+    success = df['tcp_success'].astype('int8')
+    df['success_rolling'] = _rolling_mean(success)
+    success_env = _envelope(df['datetime'], df['success_rolling'])
+    ax.plot(success_env.index, success_env['mean'],
+            label=f'Connection Success Rate ({ROLLING_WINDOW}-point rolling avg)')
+    # One marker per pixel column for each outcome seen there rather than one per check
+    checks_env = _envelope(df['datetime'], success)
+    lows = checks_env['min']
+    highs = checks_env['max'][checks_env['max'] != checks_env['min']]
+    ax.scatter(lows.index.append(highs.index), np.concatenate([lows, highs]),
+               alpha=0.3, label='Individual Checks')
+    ax.set_xlabel('Date/Time')
+    ax.set_ylabel('Success Rate')
+    ax.set_title('IPv6 Connection Success Rate Over Time')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(output_dir / 'connection_success_rate.png')
+    ax.clear()
     
     # Plot 2: TCP Connection Latency over time
-    plt.figure(figsize=(12, 7))
     # Filter out failed connections
-    latency_df = df[df['tcp_success'] == True].copy()
+    latency_df = df.loc[tcp_mask, ['datetime', 'tcp_latency']]
     if not latency_df.empty:
-        plt.plot(latency_df['datetime'], latency_df['tcp_latency'], label='TCP Round-Trip Time')
+        latency_env = _envelope(latency_df['datetime'], latency_df['tcp_latency'])
+        ax.plot(latency_env.index, latency_env['mean'], label='TCP Round-Trip Time')
+        ax.fill_between(latency_env.index, latency_env['min'], latency_env['max'], alpha=0.3)
         
         # Add rolling average
-        latency_df['latency_rolling'] = latency_df['tcp_latency'].rolling(window=10).mean()
-        plt.plot(latency_df['datetime'], latency_df['latency_rolling'], 'r-', 
-                 label='10-point Rolling Average', linewidth=2)
+        rolling_env = _envelope(latency_df['datetime'], _rolling_mean(latency_df['tcp_latency']))
+        ax.plot(rolling_env.index, rolling_env['mean'], 'r-', 
+                label=f'{ROLLING_WINDOW}-point Rolling Average', linewidth=2)
         
-        plt.xlabel('Date/Time')
-        plt.ylabel('Latency (seconds)')
-        plt.title('IPv6 Connection Latency Over Time')
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.savefig(output_dir / 'connection_latency.png')
-    plt.close()
+        ax.set_xlabel('Date/Time')
+        ax.set_ylabel('Latency (seconds)')
+        ax.set_title('IPv6 Connection Latency Over Time')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+        fig.tight_layout()
+        fig.savefig(output_dir / 'connection_latency.png')
+    ax.clear()
     
     # Plot 3: Ping Latency over time
-    plt.figure(figsize=(12, 7))
     # Filter for successful pings
-    ping_df = df[df['ping_success'] == True].copy()
+    ping_df = df.loc[ping_mask, ['datetime', 'ping_min', 'ping_avg', 'ping_max', 'ping_loss']]
     if not ping_df.empty:
-        plt.plot(ping_df['datetime'], ping_df['ping_avg'], label='Average Ping')
-        plt.fill_between(ping_df['datetime'], 
-                         ping_df['ping_min'], 
-                         ping_df['ping_max'], 
-                         alpha=0.2, 
-                         label='Min/Max Range')
+        ping_env = _envelope_columns(ping_df['datetime'], ping_df[['ping_min', 'ping_avg', 'ping_max']],
+                                     {'ping_min': 'min', 'ping_avg': 'mean', 'ping_max': 'max'})
+        ax.plot(ping_env.index, ping_env['ping_avg'], label='Average Ping')
+        ax.fill_between(ping_env.index, 
+                        ping_env['ping_min'], 
+                        ping_env['ping_max'], 
+                        alpha=0.2, 
+                        label='Min/Max Range')
         
-        plt.xlabel('Date/Time')
-        plt.ylabel('Ping Latency (ms)')
-        plt.title('IPv6 Ping Latency Over Time')
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.savefig(output_dir / 'ping_latency.png')
-    plt.close()
+        ax.set_xlabel('Date/Time')
+        ax.set_ylabel('Ping Latency (ms)')
+        ax.set_title('IPv6 Ping Latency Over Time')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+        fig.tight_layout()
+        fig.savefig(output_dir / 'ping_latency.png')
+    ax.clear()
     
     # Plot 4: Packet Loss over time
-    plt.figure(figsize=(12, 7))
     # Filter for successful pings with packet loss data
-    loss_df = ping_df[ping_df['ping_loss'].notna()].copy()
+    loss_df = ping_df[ping_df['ping_loss'].notna()]
     if not loss_df.empty:
-        plt.plot(loss_df['datetime'], loss_df['ping_loss'], 'o-')
-        plt.xlabel('Date/Time')
-        plt.ylabel('Packet Loss (%)')
-        plt.title('IPv6 Packet Loss Over Time')
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.savefig(output_dir / 'packet_loss.png')
-    plt.close()
+        # Worst loss per pixel column, so short bursts stay visible
+        loss_env = _envelope(loss_df['datetime'], loss_df['ping_loss'])
+        ax.plot(loss_env.index, loss_env['max'], 'o-')
+        ax.set_xlabel('Date/Time')
+        ax.set_ylabel('Packet Loss (%)')
+        ax.set_title('IPv6 Packet Loss Over Time')
+        ax.grid(True, alpha=0.3)
+        fig.tight_layout()
+        fig.savefig(output_dir / 'packet_loss.png')
+    ax.clear()
     
     # Plot 5: Daily success rate heatmap
-    plt.figure(figsize=(12, 7))
-    # Add hour and day columns
-    df['hour'] = df['datetime'].dt.hour
-    df['date'] = df['datetime'].dt.date
-    
     # Group by date and hour, calculate success rate
-    heatmap_data = df.groupby(['date', 'hour'])['tcp_success'].mean().unstack()
+    date = df['datetime'].dt.floor('D').rename('date')
+    hour = df['datetime'].dt.hour.rename('hour')
+    heatmap_data = df.groupby([date, hour], observed=True)['tcp_success'].mean().unstack()
     
     # Plot heatmap if we have data
     if not heatmap_data.empty:
-        plt.pcolormesh(heatmap_data.columns, range(len(heatmap_data.index)), heatmap_data.values, 
-                       cmap='RdYlGn', vmin=0, vmax=1)
-        plt.colorbar(label='Success Rate')
-        plt.xlabel('Hour of Day')
-        plt.ylabel('Date')
-        plt.title('IPv6 Connection Success Rate by Hour')
-        plt.yticks(np.arange(0.5, len(heatmap_data.index)), [d.strftime('%Y-%m-%d') for d in heatmap_data.index])
-        plt.tight_layout()
-        plt.savefig(output_dir / 'daily_success_heatmap.png')
-    plt.close()
+        # Fixed 24-hour grid so hours without checks still get their column
+        grid = heatmap_data.reindex(columns=range(24)).astype('float32').to_numpy()
+        image = ax.imshow(grid, aspect='auto', cmap='RdYlGn', vmin=0, vmax=1, origin='upper',
+                          interpolation='nearest', extent=[0, 24, len(heatmap_data.index), 0])
+        fig.colorbar(image, ax=ax, label='Success Rate')
+        ax.set_xlabel('Hour of Day')
+        ax.set_ylabel('Date')
+        ax.set_title('IPv6 Connection Success Rate by Hour')
+        ax.set_yticks(np.arange(0.5, len(heatmap_data.index)), [d.strftime('%Y-%m-%d') for d in heatmap_data.index])
+        fig.tight_layout()
+        fig.savefig(output_dir / 'daily_success_heatmap.png')
+    plt.close(fig)
     
     print(f"Plots saved to {output_dir}")
 
+# Summary section of the analysis report, filled in by generate_report
+_REPORT_TMPL = textwrap.dedent("""\
+    IPv6 Connection Monitoring Report
+    ================================
+    
+    Period: {period_start} to {period_end}
+    Total checks: {total_checks}
+    Successful connections: {successful_connections} ({success_rate:.2f}%)
+    Failed connections: {failed_connections} ({failure_rate:.2f}%)
+    
+    TCP Connection Latency (seconds):
+      Average: {avg_latency:.4f}
+      Minimum: {min_latency:.4f}
+      Maximum: {max_latency:.4f}
+      Median: {median_latency:.4f}
+    
+    Ping Statistics (ms):
+      Average ping: {avg_ping:.2f}
+      Minimum ping: {min_ping:.2f}
+      Maximum ping: {max_ping:.2f}
+      Average packet loss: {avg_packet_loss}
+    
+    Common failure reasons:""")
+
+class _NotAvailable:
+    """Placeholder for a missing statistic; formats as N/A whatever the format spec"""
+    def __format__(self, format_spec):
+        return "N/A"
+
+class _ReportFields(dict):
+    """Report values for str.format_map, with None/NaN statistics shown as N/A"""
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        return _NotAvailable() if pd.isna(value) else value
+
 def generate_report(df, output_file=None):
     """Generate a summary report"""
     if df is None or df.empty:
@@ -211,59 +426,44 @@ def generate_report(df, output_file=None):
     total_checks = len(df)
     successful_connections = df['tcp_success'].sum()
     success_rate = (successful_connections / total_checks) * 100 if total_checks > 0 else 0
+    tcp_mask = df['tcp_success'].to_numpy()
+    ping_mask = df['ping_success'].to_numpy()
     
-    # Calculate latency statistics for successful connections
-    latency_df = df[df['tcp_success'] == True]
-    if not latency_df.empty:
-        avg_latency = latency_df['tcp_latency'].mean()
-        min_latency = latency_df['tcp_latency'].min()
-        max_latency = latency_df['tcp_latency'].max()
-        median_latency = latency_df['tcp_latency'].median()
-    else:
-        avg_latency = min_latency = max_latency = median_latency = None
+    # Calculate latency statistics for successful connections; empty selections give NaN
+    latency = df.loc[tcp_mask, 'tcp_latency']
+    ping_df = df.loc[ping_mask, ['ping_min', 'ping_avg', 'ping_max', 'ping_loss']]
     
-    # Calculate ping statistics
-    ping_df = df[df['ping_success'] == True]
-    if not ping_df.empty:
-        avg_ping = ping_df['ping_avg'].mean()
-        min_ping = ping_df['ping_min'].min()
-        max_ping = ping_df['ping_max'].max()
-        avg_packet_loss = ping_df['ping_loss'].mean()
-    else:
-        avg_ping = min_ping = max_ping = avg_packet_loss = None
+    # Loss is kept in percent and formatted here, so a missing value shows as N/A without a '%'
+    avg_packet_loss = ping_df['ping_loss'].mean()
+    avg_packet_loss = "N/A" if pd.isna(avg_packet_loss) else f"{avg_packet_loss:.2f}%"
     
     # Generate report
-    report = [
-        "IPv6 Connection Monitoring Report",
-        "================================",
-        "",
-        f"Period: {df['datetime'].min()} to {df['datetime'].max()}",
-        f"Total checks: {total_checks}",
-        f"Successful connections: {successful_connections} ({success_rate:.2f}%)",
-        f"Failed connections: {total_checks - successful_connections} ({100 - success_rate:.2f}%)",
-        "",
-        "TCP Connection Latency (seconds):",
-        f"  Average: {avg_latency:.4f}" if avg_latency is not None else "  Average: N/A",
-        f"  Minimum: {min_latency:.4f}" if min_latency is not None else "  Minimum: N/A",
-        f"  Maximum: {max_latency:.4f}" if max_latency is not None else "  Maximum: N/A",
-        f"  Median: {median_latency:.4f}" if median_latency is not None else "  Median: N/A",
-        "",
-        "Ping Statistics (ms):",
-        f"  Average ping: {avg_ping:.2f}" if avg_ping is not None else "  Average ping: N/A",
-        f"  Minimum ping: {min_ping:.2f}" if min_ping is not None else "  Minimum ping: N/A",
-        f"  Maximum ping: {max_ping:.2f}" if max_ping is not None else "  Maximum ping: N/A",
-        f"  Average packet loss: {avg_packet_loss:.2f}%" if avg_packet_loss is not None else "  Average packet loss: N/A",
-        "",
-        "Common failure reasons:",
-    ]
+    report = [_REPORT_TMPL.format_map(_ReportFields(
+        period_start=df['datetime'].min(),
+        period_end=df['datetime'].max(),
+        total_checks=total_checks,
+        successful_connections=successful_connections,
+        success_rate=success_rate,
+        failed_connections=total_checks - successful_connections,
+        failure_rate=100 - success_rate,
+        avg_latency=latency.mean(),
+        min_latency=latency.min(),
+        max_latency=latency.max(),
+        median_latency=latency.median(),
+        avg_ping=ping_df['ping_avg'].mean(),
+        min_ping=ping_df['ping_min'].min(),
+        max_ping=ping_df['ping_max'].max(),
+        avg_packet_loss=avg_packet_loss
+    ))]
     
     # Add common failure reasons
-    error_df = df[df['tcp_success'] == False]
-    if not error_df.empty:
-        error_counts = error_df['tcp_error'].value_counts()
+    failed_checks = total_checks - tcp_mask.sum()
+    if failed_checks:
+        error_counts = df.loc[~tcp_mask, 'tcp_error'].value_counts(dropna=True)
         for error, count in error_counts.items():
-            if pd.notna(error):
-                report.append(f"  {error}: {count} times ({count/len(error_df)*100:.2f}%)")
+            # Categorical counts include every category, so skip the ones never seen here
+            if count:
+                report.append(f"  {error}: {count} times ({count/failed_checks*100:.2f}%)")
     else:
         report.append("  No failures recorded")
     
@@ -293,6 +493,6 @@ def main():
     print(f"Loading data from {args.data_dir} for the last {args.days} days...")
     data = load_data(args.data_dir, days=args.days)
     
-    if not data:
+    if data.empty:
         print("No data found. Please check that the data directory is correct.")
         
\ No newline at end of file
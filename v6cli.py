@@ -6,14 +6,29 @@ Run this on the Digital Ocean VM in NYC
 
 import socket
 import time
+import atexit
 import json
 import logging
 import datetime
 import argparse
 import sys
-import statistics
+import signal
+import re
 from pathlib import Path
 import subprocess
+import numpy as np
+
+try:
+    import pyarrow as pa
+except ImportError:
+    # pyarrow is optional; without it only the NDJSON files are written
+    pa = None
+
+try:
+    import icmplib
+except ImportError:
+    # icmplib is optional; without it ping_test runs the system ping command
+    icmplib = None
 
 # Setup logging
 logging.basicConfig(
@@ -27,11 +42,46 @@ logging.basicConfig(
 
 logger = logging.getLogger("ipv6-monitor-client")
 
+# Packet counts and rtt summary from iputils ping output, e.g.
+#   5 packets transmitted, 5 received, 0% packet loss, time 4006ms
+#   rtt min/avg/max/mdev = 14.723/17.331/20.458/2.333 ms
+_PING_RE = re.compile(
+    r'(\d+) packets transmitted, (\d+) received,.*?([\d.]+)% packet loss'
+    r'.*?rtt min/avg/max/mdev = ([\d.]+)/([\d.]+)/([\d.]+)/([\d.]+)',
+    re.S
+)
+
+# Constant leading part of every check payload; only the variable fields are encoded per check
+_CHECK_PREFIX = b'{"message": "IPv6 connection check", '
+
+# Flat, typed columns of each check in the Arrow IPC stream written next to the JSON file
+CHECK_SCHEMA = pa.schema([
+    ("timestamp", pa.float64()),
+    ("datetime", pa.string()),
+    ("tcp_success", pa.bool_()),
+    ("tcp_latency", pa.float32()),
+    ("tcp_error", pa.string()),
+    ("ping_success", pa.bool_()),
+    ("ping_min", pa.float32()),
+    ("ping_avg", pa.float32()),
+    ("ping_max", pa.float32()),
+    ("ping_loss", pa.float32())
+]) if pa is not None else None
+
+# Number of recent round-trip times kept for the report
+LATENCY_HISTORY_SIZE = 1000
+
+# Checks buffered before each Arrow record batch is written; the JSON file stays authoritative
+ARROW_BATCH_ROWS = 60
+
 class IPv6MonitorClient:
-    def __init__(self, server_host, server_port=8888, interval=60, data_dir='./data'):
+    def __init__(self, server_host, server_port=8888, interval=60, data_dir='./data',
+                 keep_raw=False, verbose=False):
         self.server_host = server_host
         self.server_port = server_port
         self.interval = interval  # seconds between checks
+        self.keep_raw = keep_raw  # store raw ping output with each check
+        self.verbose = verbose  # store the server's response with each check
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
         
@@ -40,56 +90,46 @@ class IPv6MonitorClient:
             "checks": 0,
             "successful_connections": 0,
             "failed_connections": 0,
-            "latency_history": [],
             "start_time": time.time()
         }
+        
+        # Last LATENCY_HISTORY_SIZE round-trip times, kept in a fixed ring buffer
+        self._lat_buf = np.empty(LATENCY_HISTORY_SIZE, dtype=np.float32)
+        self._lat_n = 0
+        self._lat_head = 0
+        
+        # Daily data file, kept open between checks and rotated when the date changes
+        self._fh = None
+        self._fh_date = None
+        self._arrow_fh = None
+        self._arrow_writer = None
+        self._arrow_rows = []
+        # pyarrow cannot build record batches during interpreter shutdown, so only the JSON
+        # file is closed at exit; start() flushes the Arrow rows before returning
+        atexit.register(self._close_json)
+        
+        # Server address, resolved on the first check and reused after that
+        self._sockaddr = None
+        
+        # Ping in-process when icmplib can open an unprivileged ICMP socket
+        self._use_icmplib = icmplib is not None
+        
+        # Receive buffer reused across checks
+        self._recv_buf = bytearray(4096)
+        self._recv_view = memoryview(self._recv_buf)
     
     def ping_test(self):
         """Run ping test to the server"""
         try:
-            # Use subprocess to run ping6 command
-            cmd = ["ping", "-6", "-c", "5", self.server_host]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+            if self._use_icmplib:
+                try:
+                    return self._icmp_ping()
+                except icmplib.SocketPermissionError as e:
+                    # Unprivileged ICMP sockets need net.ipv4.ping_group_range to cover our group
+                    logger.warning(f"In-process ping unavailable, using the ping command: {str(e)}")
+                    self._use_icmplib = False
             
-            if result.returncode == 0:
-                # Extract ping statistics
-                output = result.stdout
-                
-                # Parse ping output (this is simplistic and may need adjustment)
-                # Example line: "rtt min/avg/max/mdev = 14.723/17.331/20.458/2.333 ms"
-                rtt_line = [line for line in output.split('\n') if "rtt min/avg/max/mdev" in line]
-                if rtt_line:
-                    rtt_stats = rtt_line[0].split(' = ')[1].split('/')
-                    ping_data = {
-                        "min": float(rtt_stats[0]),
-                        "avg": float(rtt_stats[1]),
-                        "max": float(rtt_stats[2]),
-                        "mdev": float(rtt_stats[3].split()[0])
-                    }
-                    
-                    # Parse packet loss
-                    loss_line = [line for line in output.split('\n') if "packets transmitted" in line]
-                    if loss_line:
-                        parts = loss_line[0].split(',')
-                        transmitted = int(parts[0].split()[0])
-                        received = int(parts[1].split()[0])
-                        loss_percent = float(parts[2].split()[0].replace('%', ''))
-                        
-                        ping_data["transmitted"] = transmitted
-                        ping_data["received"] = received
-                        ping_data["loss_percent"] = loss_percent
-                    
-                    return {
-                        "success": True,
-                        "ping": ping_data,
-                        "raw_output": output
-                    }
-            
-            return {
-                "success": False,
-                "error": "Ping failed",
-                "raw_output": result.stdout + "\n" + result.stderr
-            }
+            return self._command_ping()
             
         except Exception as e:
             logger.error(f"Error during ping test: {str(e)}")
@@ -98,6 +138,67 @@ class IPv6MonitorClient:
                 "error": str(e)
             }
     
+    def _icmp_ping(self):
+        """Ping the server over an ICMPv6 socket, without spawning a process"""
+        host = icmplib.ping(self.server_host, count=5, interval=1, timeout=2, family=6, privileged=False)
+        
+        if not host.is_alive:
+            return {
+                "success": False,
+                "error": "Ping failed"
+            }
+        
+        return {
+            "success": True,
+            "ping": {
+                "min": host.min_rtt,
+                "avg": host.avg_rtt,
+                "max": host.max_rtt,
+                "mdev": float(np.std(host.rtts)),  # population std dev, as ping reports mdev
+                "transmitted": host.packets_sent,
+                "received": host.packets_received,
+                "loss_percent": host.packet_loss * 100
+            }
+        }
+    
+    def _command_ping(self):
+        """Ping the server by running the system ping command"""
+        # Use subprocess to run ping6 command
+        cmd = ["ping", "-6", "-c", "5", self.server_host]
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+        
+        if result.returncode == 0:
+            # Extract ping statistics in a single pass over the output
+            output = result.stdout
+            match = _PING_RE.search(output)
+            if match:
+                transmitted, received, loss, rtt_min, rtt_avg, rtt_max, rtt_mdev = match.groups()
+                ping_data = {
+                    "min": float(rtt_min),
+                    "avg": float(rtt_avg),
+                    "max": float(rtt_max),
+                    "mdev": float(rtt_mdev),
+                    "transmitted": int(transmitted),
+                    "received": int(received),
+                    "loss_percent": float(loss)
+                }
+                
+                ping_results = {
+                    "success": True,
+                    "ping": ping_data
+                }
+                if self.keep_raw:
+                    ping_results["raw_output"] = output
+                return ping_results
+        
+        ping_results = {
+            "success": False,
+            "error": "Ping failed"
+        }
+        if self.keep_raw:
+            ping_results["raw_output"] = result.stdout + "\n" + result.stderr
+        return ping_results
+    
     def check_connection(self):
         """Perform a connection check to the IPv6 server"""
         timestamp = time.time()
@@ -121,36 +222,40 @@ class IPv6MonitorClient:
         
         # Now try TCP connection
         try:
+            # Prepare data to send before timing starts, so encoding isn't counted as latency
+            data = {
+                "client_time": timestamp,
+                "check_number": self.stats["checks"] + 1,
+                "ping_successful": ping_results["success"]
+            }
+            
+            # Add ping stats if available
+            if ping_results["success"]:
+                data["ping_stats"] = ping_results["ping"]
+            
+            payload = _CHECK_PREFIX + json.dumps(data)[1:].encode('utf-8')
+            sockaddr = self._server_sockaddr()
+            
             # Record start time for latency calculation
             start_time = time.time()
             
-            # Create IPv6 socket
+            # Create IPv6 socket; disable Nagle so the small request goes out immediately
             client_socket = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
             client_socket.settimeout(10)  # 10-second timeout
+            client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             
             # Connect to server
-            client_socket.connect((self.server_host, self.server_port, 0, 0))
+            client_socket.connect(sockaddr)
             
             # Calculate initial connection latency
             connection_latency = time.time() - start_time
             
-            # Prepare data to send
-            data = {
-                "client_time": timestamp,
-                "message": "IPv6 connection check",
-                "check_number": self.stats["checks"] + 1,
-                "ping_successful": ping_results["success"]
-            }
-            
-            # Add ping stats if available
-            if ping_results["success"]:
-                data["ping_stats"] = ping_results["ping"]
-            
             # Send data to server
-            client_socket.send(json.dumps(data).encode('utf-8'))
+            client_socket.sendall(payload)
             
             # Wait for response
-            response = client_socket.recv(4096).decode('utf-8')
+            received = client_socket.recv_into(self._recv_buf)
+            response = str(self._recv_view[:received], 'utf-8')
             
             # Calculate total round-trip time
             rtt = time.time() - start_time
@@ -158,7 +263,8 @@ class IPv6MonitorClient:
             # Parse server response
             try:
                 server_response = json.loads(response)
-                results["server_response"] = server_response
+                if self.verbose:
+                    results["server_response"] = server_response
                 
                 # Update TCP connection results
                 results["tcp_connection"]["success"] = True
@@ -167,11 +273,9 @@ class IPv6MonitorClient:
                 
                 # Update stats
                 self.stats["successful_connections"] += 1
-                self.stats["latency_history"].append(rtt)
-                
-                # Keep only the last 1000 latency values to avoid unbounded memory growth
-                if len(self.stats["latency_history"]) > 1000:
-                    self.stats["latency_history"] = self.stats["latency_history"][-1000:]
+                self._lat_buf[self._lat_head] = rtt
+                self._lat_head = (self._lat_head + 1) % LATENCY_HISTORY_SIZE
+                self._lat_n = min(self._lat_n + 1, LATENCY_HISTORY_SIZE)
                 
                 logger.info(f"Successfully connected to server. RTT: {rtt:.4f}s")
                 
@@ -183,11 +287,14 @@ class IPv6MonitorClient:
             results["tcp_connection"]["error"] = "Connection timeout"
             self.stats["failed_connections"] += 1
             logger.error("Connection timeout")
+            # Re-resolve the server address on the next check in case it moved
+            self._sockaddr = None
             
         except socket.error as e:
             results["tcp_connection"]["error"] = f"Socket error: {str(e)}"
             self.stats["failed_connections"] += 1
             logger.error(f"Socket error: {str(e)}")
+            self._sockaddr = None
             
         except Exception as e:
             results["tcp_connection"]["error"] = f"Error: {str(e)}"
@@ -203,16 +310,82 @@ class IPv6MonitorClient:
             
             # Save results to file
             self.save_results(results)
-            
-            return results
+        
+        # Returned outside the finally so a SystemExit from the SIGTERM handler still propagates
+        return results
+    
+    def _server_sockaddr(self):
+        """Resolve the server address once; it is looked up again after a failed connect"""
+        if self._sockaddr is None:
+            addrinfo = socket.getaddrinfo(self.server_host, self.server_port,
+                                          socket.AF_INET6, socket.SOCK_STREAM)
+            self._sockaddr = addrinfo[0][4]
+        return self._sockaddr
     
     def save_results(self, results):
         """Save check results to a file"""
         timestamp = datetime.datetime.now().strftime("%Y%m%d")
-        file_path = self.data_dir / f"checks_{timestamp}.json"
+        if timestamp != self._fh_date:
+            self._close()
+            file_path = self.data_dir / f"checks_{timestamp}.json"
+            self._fh = open(file_path, "a", buffering=1)
+            self._fh_date = timestamp
+            
+            if pa is not None:
+                # Each run appends its own stream; the analysis tool reads them back to back
+                self._arrow_fh = open(file_path.with_suffix(".arrow"), "ab")
+                self._arrow_writer = pa.ipc.new_stream(self._arrow_fh, CHECK_SCHEMA)
+        
+        self._fh.write(json.dumps(results) + "\n")
+        
+        if self._arrow_writer is not None:
+            self._arrow_rows.append(self._flatten(results))
+            if len(self._arrow_rows) >= ARROW_BATCH_ROWS:
+                self._write_arrow_batch()
+    
+    def _write_arrow_batch(self):
+        """Write the buffered checks to the Arrow stream as one record batch"""
+        if self._arrow_rows:
+            batch = pa.RecordBatch.from_pylist(self._arrow_rows, schema=CHECK_SCHEMA)
+            self._arrow_writer.write_batch(batch)
+            self._arrow_fh.flush()
+            self._arrow_rows = []
+    
+    @staticmethod
+    def _flatten(results):
+        """Flatten a check result into the columns of CHECK_SCHEMA"""
+        tcp = results["tcp_connection"]
+        ping = results["ping_results"].get("ping", {})
+        return {
+            "timestamp": results["timestamp"],
+            "datetime": results["datetime"],
+            "tcp_success": tcp["success"],
+            "tcp_latency": tcp["latency"],
+            "tcp_error": tcp["error"],
+            "ping_success": results["ping_results"]["success"],
+            "ping_min": ping.get("min"),
+            "ping_avg": ping.get("avg"),
+            "ping_max": ping.get("max"),
+            "ping_loss": ping.get("loss_percent")
+        }
+    
+    def _close(self):
+        """Close the current daily data files"""
+        self._close_json()
         
-        with open(file_path, "a") as f:
-            f.write(json.dumps(results) + "\n")
+        if self._arrow_writer is not None:
+            self._write_arrow_batch()
+            self._arrow_writer.close()
+            self._arrow_fh.close()
+            self._arrow_writer = None
+            self._arrow_fh = None
+    
+    def _close_json(self):
+        """Close the current daily JSON file"""
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+            self._fh_date = None
     
     def generate_report(self):
         """Generate a simple statistics report"""
@@ -233,16 +406,17 @@ class IPv6MonitorClient:
         ]
         
         # Add latency statistics if we have data
-        if self.stats["latency_history"]:
-            latency_data = self.stats["latency_history"]
+        if self._lat_n:
+            # Order doesn't matter for these statistics, so the filled prefix is used as-is
+            latency_data = self._lat_buf[:self._lat_n]
             report.extend([
                 f"",
                 f"Latency Statistics (seconds):",
-                f"  Minimum: {min(latency_data):.4f}",
-                f"  Maximum: {max(latency_data):.4f}",
-                f"  Average: {sum(latency_data) / len(latency_data):.4f}",
-                f"  Median: {statistics.median(latency_data):.4f}",
-                f"  Std Dev: {statistics.stdev(latency_data) if len(latency_data) > 1 else 0:.4f}"
+                f"  Minimum: {latency_data.min():.4f}",
+                f"  Maximum: {latency_data.max():.4f}",
+                f"  Average: {latency_data.mean():.4f}",
+                f"  Median: {np.median(latency_data):.4f}",
+                f"  Std Dev: {latency_data.std(ddof=1) if len(latency_data) > 1 else 0:.4f}"
             ])
         
         return "\n".join(report)
@@ -270,6 +444,10 @@ class IPv6MonitorClient:
         except Exception as e:
             logger.error(f"Error in monitoring loop: {str(e)}")
             sys.exit(1)
+        
+        finally:
+            # Flush buffered Arrow rows while the interpreter is still fully up
+            self._close()
 
 def main():
     """Main function to run the client"""
@@ -279,6 +457,8 @@ def main():
     parser.add_argument('--interval', type=int, default=60, help='Check interval in seconds')
     parser.add_argument('--data-dir', default='./data', help='Directory to store data')
     parser.add_argument('--report', action='store_true', help='Generate a report and exit')
+    parser.add_argument('--keep-raw', action='store_true', help='Store raw ping output with each check')
+    parser.add_argument('--verbose', action='store_true', help='Store the server response with each check')
     
     args = parser.parse_args()
     
@@ -286,13 +466,18 @@ def main():
         server_host=args.server_host,
         server_port=args.port,
         interval=args.interval,
-        data_dir=args.data_dir
+        data_dir=args.data_dir,
+        keep_raw=args.keep_raw,
+        verbose=args.verbose
     )
     
     if args.report:
         # Just generate a report from existing data
         print(client.generate_report())
     else:
+        # systemd stops the service with SIGTERM; exit through start() so the data files are flushed
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        
         # Start the monitoring loop
         client.start()
 
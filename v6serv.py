@@ -6,11 +6,14 @@ Run this on the Raspberry Pi in Vermont
 
 import socket
 import time
+import atexit
+import asyncio
 import json
 import logging
 import datetime
 import threading
 import argparse
+from dataclasses import dataclass
 from pathlib import Path
 
 # Setup logging
@@ -25,6 +28,17 @@ logging.basicConfig(
 
 logger = logging.getLogger("ipv6-monitor-server")
 
+# Pre-encoded responses; only the server timestamp varies between successful replies
+_OK_TMPL = b'{"status": "success", "server_time": %.6f, "message": "Data received successfully"}'
+_ERR_BYTES = json.dumps({"status": "error", "message": "Invalid JSON data"}).encode('utf-8')
+
+@dataclass(slots=True)
+class ClientStat:
+    """Per-client request history"""
+    first_seen: float
+    last_seen: float
+    request_count: int = 0
+
 class IPv6MonitorServer:
     def __init__(self, host='::', port=8888, data_dir='./data'):
         self.host = host
@@ -36,17 +50,21 @@ class IPv6MonitorServer:
         self.stats = {
             "total_requests": 0,
             "start_time": time.time(),
-            "client_history": {}
+            "client_history": {}  # client address -> ClientStat
         }
         
-        # Create lock for thread-safe operations
-        self.stats_lock = threading.Lock()
+        # Statistics are only touched from the event loop
+        self.stats_lock = asyncio.Lock()
+        
+        # Daily data file, kept open between requests and rotated when the date changes.
+        # Writes run in worker threads so they get their own thread lock.
+        self._fh = None
+        self._fh_date = None
+        self._fh_lock = threading.Lock()
+        atexit.register(self._close)
     
-    def save_request(self, client_addr, data):
+    async def save_request(self, client_addr, data):
         """Save request data to a file"""
-        timestamp = datetime.datetime.now().strftime("%Y%m%d")
-        file_path = self.data_dir / f"requests_{timestamp}.json"
-        
         entry = {
             "timestamp": time.time(),
             "client": client_addr,
@@ -54,30 +72,50 @@ class IPv6MonitorServer:
             "server_time": datetime.datetime.now().isoformat()
         }
         
-        # Append to the daily file
-        with open(file_path, "a") as f:
-            f.write(json.dumps(entry) + "\n")
+        # Append to the daily file off the event loop so disk I/O doesn't stall other clients
+        await asyncio.to_thread(self._write_entry, entry)
         
         # Update statistics
-        with self.stats_lock:
+        now = time.time()
+        async with self.stats_lock:
             self.stats["total_requests"] += 1
             
-            if client_addr not in self.stats["client_history"]:
-                self.stats["client_history"][client_addr] = {
-                    "first_seen": time.time(),
-                    "request_count": 0
-                }
+            client_stat = self.stats["client_history"].get(client_addr)
+            if client_stat is None:
+                client_stat = self.stats["client_history"][client_addr] = ClientStat(first_seen=now, last_seen=now)
+            
+            client_stat.last_seen = now
+            client_stat.request_count += 1
+    
+    def _write_entry(self, entry):
+        """Append one entry to the daily file, rotating it when the date changes"""
+        timestamp = datetime.datetime.now().strftime("%Y%m%d")
+        line = json.dumps(entry) + "\n"
+        
+        with self._fh_lock:
+            if timestamp != self._fh_date:
+                self._close()
+                file_path = self.data_dir / f"requests_{timestamp}.json"
+                self._fh = open(file_path, "a", buffering=1)
+                self._fh_date = timestamp
             
-            self.stats["client_history"][client_addr]["request_count"] += 1
-            self.stats["client_history"][client_addr]["last_seen"] = time.time()
+            self._fh.write(line)
+    
+    def _close(self):
+        """Close the current daily data file"""
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+            self._fh_date = None
     
-    def handle_client(self, client_socket, client_addr):
+    async def handle_client(self, reader, writer):
         """Handle an individual client connection"""
+        client_addr = writer.get_extra_info('peername')
         logger.info(f"Connection from {client_addr}")
         
         try:
             # Receive data from client
-            data = client_socket.recv(4096).decode('utf-8')
+            data = (await reader.read(4096)).decode('utf-8')
             
             if data:
                 # Try to parse as JSON
@@ -86,62 +124,41 @@ class IPv6MonitorServer:
                     logger.info(f"Received data: {client_data}")
                     
                     # Save the request data
-                    self.save_request(client_addr[0], client_data)
+                    await self.save_request(client_addr[0], client_data)
                     
                     # Send response with server timestamp
-                    response = {
-                        "status": "success",
-                        "server_time": time.time(),
-                        "message": "Data received successfully"
-                    }
-                    client_socket.send(json.dumps(response).encode('utf-8'))
+                    writer.write(_OK_TMPL % time.time())
+                    await writer.drain()
                     
                 except json.JSONDecodeError:
                     logger.error(f"Invalid JSON received: {data}")
-                    response = {
-                        "status": "error",
-                        "message": "Invalid JSON data"
-                    }
-                    client_socket.send(json.dumps(response).encode('utf-8'))
+                    writer.write(_ERR_BYTES)
+                    await writer.drain()
             
         except Exception as e:
             logger.error(f"Error handling client {client_addr}: {str(e)}")
         
         finally:
-            client_socket.close()
+            writer.close()
     
-    def start(self):
+    async def start(self):
         """Start the IPv6 monitor server"""
         try:
-            # Create IPv6 socket
-            server_socket = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
-            server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            
-            # Bind to the address and port
-            server_socket.bind((self.host, self.port, 0, 0))
-            
-            # Listen for connections
-            server_socket.listen(5)
+            # Create IPv6 listening socket; one event loop serves all clients
+            server = await asyncio.start_server(
+                self.handle_client,
+                self.host,
+                self.port,
+                family=socket.AF_INET6,
+                reuse_address=True
+            )
             logger.info(f"Server started on [{self.host}]:{self.port}")
             
-            while True:
-                # Accept client connection
-                client_socket, client_addr = server_socket.accept()
-                
-                # Handle client in a new thread
-                client_thread = threading.Thread(
-                    target=self.handle_client,
-                    args=(client_socket, client_addr)
-                )
-                client_thread.daemon = True
-                client_thread.start()
+            async with server:
+                await server.serve_forever()
                 
         except Exception as e:
             logger.error(f"Server error: {str(e)}")
-        
-        finally:
-            if 'server_socket' in locals():
-                server_socket.close()
 
 def main():
     """Main function to run the server"""
@@ -157,7 +174,11 @@ def main():
         port=args.port,
         data_dir=args.data_dir
     )
-    server.start()
+    
+    try:
+        asyncio.run(server.start())
+    except KeyboardInterrupt:
+        logger.info("Server stopped by user")
 
 if __name__ == "__main__":
     main()
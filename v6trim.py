@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+IPv6 Connection Monitor - Data Trim Tool
+Use this once to strip raw ping output from existing check files.
+Stop the client first: it keeps the current day's file open for appending.
+"""
+
+import os
+import json
+import argparse
+from pathlib import Path
+
+def trim_file(file_path, drop_server_response=False):
+    """Rewrite a check file without raw ping output, returning (old_size, new_size)"""
+    file_path = Path(file_path)
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
+    old_size = file_path.stat().st_size
+    
+    # Stream line by line so large files are never held in memory
+    with open(file_path, 'r') as src, open(tmp_path, 'w') as dst:
+        for line in src:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Keep lines we cannot parse untouched rather than losing them
+                dst.write(line)
+                continue
+            
+            entry.get('ping_results', {}).pop('raw_output', None)
+            if drop_server_response:
+                entry.pop('server_response', None)
+            
+            dst.write(json.dumps(entry) + "\n")
+    
+    os.replace(tmp_path, file_path)
+    return old_size, file_path.stat().st_size
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='IPv6 Connection Monitor Data Trim Tool')
+    parser.add_argument('--data-dir', default='./data', help='Directory containing monitoring data')
+    parser.add_argument('--drop-server-response', action='store_true',
+                        help='Also remove the stored server response from each check')
+    
+    args = parser.parse_args()
+    
+    for file_path in sorted(Path(args.data_dir).glob('checks_*.json')):
+        old_size, new_size = trim_file(file_path, drop_server_response=args.drop_server_response)
+        print(f"{file_path}: {old_size} -> {new_size} bytes")
+
+if __name__ == "__main__":
+    main()